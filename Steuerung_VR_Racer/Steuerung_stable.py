@@ -83,6 +83,7 @@ ENA = PWMOutputDevice(MOTOR_ENA, pin_factory=factory, frequency=PWM_FREQUENCY)
 # =========================
 
 last_servo_value = 0.0
+last_motor_speed = None       # None = Zustand unbekannt, nächster Aufruf schreibt sicher
 
 
 # =========================
@@ -140,6 +141,13 @@ def set_motor(speed: float):
     - 0: Stop
     """
 
+    global last_motor_speed
+
+    # set_motor läuft bei jedem Achsen-Event – unveränderte Werte nicht erneut an die GPIOs schicken
+    if speed == last_motor_speed:
+        return
+    last_motor_speed = speed
+
     if speed > 0:
         IN1.on()
         IN2.off()
@@ -166,6 +174,9 @@ def emergency_stop():
     - Motor
     - Servo (deaktiviert)
     """
+    global last_motor_speed
+
+    last_motor_speed = None       # Stopp immer wirklich ausgeben
     set_motor(0.0)
     servo.detach()
 
@@ -1,6 +1,8 @@
 from aiortc import VideoStreamTrack
 from av import VideoFrame
 import asyncio
+import atexit
+import gc
 import threading
 import time
 import os
@@ -9,8 +11,21 @@ from multiprocessing.shared_memory import SharedMemory
 from typing import Optional, Tuple
 import numpy as np
 
-from picamera2 import Picamera2
-import cv2
+# picamera2 und cv2 erst bei Bedarf laden (_load_camera_libs): der Server-Prozess liest nur
+# Shared Memory und spart sich so libcamera/OpenCV beim Start – und läuft auch ohne picamera2.
+Picamera2 = None
+MappedArray = None
+cv2 = None
+
+
+def _load_camera_libs(with_camera: bool = True):
+    global Picamera2, MappedArray, cv2
+    if cv2 is None:
+        import cv2 as _cv2
+        cv2 = _cv2
+    if with_camera and Picamera2 is None:
+        from picamera2 import MappedArray as _MappedArray, Picamera2 as _Picamera2
+        Picamera2, MappedArray = _Picamera2, _MappedArray
 
 
 class MotionCameraStream(VideoStreamTrack):
@@ -18,6 +33,7 @@ class MotionCameraStream(VideoStreamTrack):
 
     def __init__(self, camera_index=0, target_size=(1280, 720), sensitivity=40, max_fps=None, use_all_cores=True):
         super().__init__()
+        _load_camera_libs()
 
         if use_all_cores and not MotionCameraStream._cv_configured:
             MotionCameraStream._configure_cv_threads()
@@ -38,6 +54,7 @@ class MotionCameraStream(VideoStreamTrack):
         self.motion_detected = False
         self.sensitivity = sensitivity
         self.running = True
+        self._stop_event = threading.Event()  # weckt die FPS-Pause bei stop() sofort auf
         self.max_fps = max_fps
 
         time.sleep(1.5)  # AWB stabilisieren
@@ -72,7 +89,7 @@ class MotionCameraStream(VideoStreamTrack):
                 next_frame_time += frame_interval
                 sleep_for = next_frame_time - time.monotonic()
                 if sleep_for > 0:
-                    time.sleep(sleep_for)
+                    self._stop_event.wait(sleep_for)
 
     async def recv(self):
         pts, time_base = await self.next_timestamp()
@@ -83,6 +100,7 @@ class MotionCameraStream(VideoStreamTrack):
 
     def stop(self):
         self.running = False
+        self._stop_event.set()
         self.picam.stop()
         print("Kamera gestoppt.")
 
@@ -107,6 +125,13 @@ class MotionCameraStream(VideoStreamTrack):
                 return Picamera2()
 
 
+def _frame_shape(width: int, height: int, frame_format: str) -> Tuple[int, ...]:
+    """yuv420p liegt planar (I420) im Shared Memory, alle anderen Formate als 3-Kanal-Bild"""
+    if frame_format == "yuv420p":
+        return (height * 3 // 2, width)
+    return (height, width, 3)
+
+
 def _camera_worker(
     shm_name: str,
     width: int,
@@ -115,50 +140,99 @@ def _camera_worker(
     max_fps: float,
     use_all_cores: bool,
     pixel_format: str,
+    frame_format: str,
     swap_rb: bool,
     color_convert: str,
     test_pattern: bool,
     buffer_count: int,
     queue: bool,
-    lock: mp.Lock,
     stop_event: mp.Event,
+    frame_seq,
+    cpu: Optional[int] = None,
+    gc_interval: int = 0,
 ):
+    _load_camera_libs(with_camera=not test_pattern)
+
+    if cpu is not None:
+        # Fester Kern → Frame-Puffer bleiben im L1/L2 statt mit dem Prozess zu wandern
+        try:
+            os.sched_setaffinity(0, {cpu})
+            cv2.setNumThreads(1)
+            use_all_cores = False
+        except (AttributeError, OSError) as exc:
+            print(f"⚠️ CPU-Pinning auf Kern {cpu} fehlgeschlagen: {exc}")
     if use_all_cores:
         MotionCameraStream._configure_cv_threads()
 
     color_convert = (color_convert or "auto").lower()
     pixel_format_upper = (pixel_format or "RGB888").upper()
 
+    # yuv420p: YUV420 vom ISP ungewandelt durchreichen – der WebRTC-Encoder will ohnehin I420
+    passthrough = frame_format == "yuv420p"
+
     shm = SharedMemory(name=shm_name)
-    shared_frame = np.ndarray((height, width, 3), dtype=np.uint8, buffer=shm.buf)
-
-    def _convert_frame(frame: np.ndarray) -> np.ndarray:
-        if color_convert == "auto":
-            if frame.ndim == 2:
-                frame = cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_I420)
-            elif frame.shape[2] == 4:
-                if pixel_format_upper.startswith("XBGR") or pixel_format_upper.startswith("BGRA"):
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-                else:
-                    frame = cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR)
-            elif swap_rb:
-                frame = frame[:, :, ::-1]
-            return frame
-        if color_convert == "none":
-            if swap_rb:
-                frame = frame[:, :, ::-1]
-            return frame
-        if color_convert == "rgb2bgr" or color_convert == "bgr2rgb":
-            return frame[:, :, ::-1]
-        if color_convert == "rgba2bgr":
-            return cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR)
-        if color_convert == "bgra2bgr":
-            return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-        if color_convert == "yuv420":
-            return cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_I420)
+    shape = _frame_shape(width, height, frame_format)
+    # Doppelpuffer: geschrieben wird immer in den Slot, den gerade kein Leser braucht
+    slots = np.ndarray((2,) + shape, dtype=np.uint8, buffer=shm.buf)
+    # Fester Zielpuffer für cvtColor → keine neue Allokation pro Frame
+    scratch = np.empty(shape, dtype=np.uint8)
+    # Dichtes I420 ohne Stride-Polster; bei Passthrough ist das schon scratch, sonst erst bei Bedarf
+    i420 = scratch if passthrough else None
+
+    def _publish(frame: np.ndarray):
+        seq = frame_seq.value + 1
+        np.copyto(slots[seq % 2], frame)
+        frame_seq.value = seq  # erst nach dem Kopieren sichtbar machen
+
+    def _dense_i420(frame: np.ndarray) -> np.ndarray:
+        """picamera2 legt YUV420 mit Zeilen-Stride ab (Y-Zeilen = stride, U/V-Zeilen = stride/2) → dicht packen"""
+        nonlocal i420
+        stride = frame.shape[1]
+        if stride == width:
+            return frame[:height * 3 // 2]
+        if i420 is None:
+            i420 = np.empty((height * 3 // 2, width), dtype=np.uint8)
+        chroma_w, chroma_h, chroma_stride = width // 2, height // 2, stride // 2
+        flat = frame.reshape(-1)
+        out = i420.reshape(-1)
+        i420[:height] = frame[:height, :width]
+        src, dst = height * stride, height * width
+        for _ in range(2):  # erst U, dann V
+            plane = flat[src:src + chroma_h * chroma_stride].reshape(chroma_h, chroma_stride)
+            out[dst:dst + chroma_h * chroma_w].reshape(chroma_h, chroma_w)[:] = plane[:, :chroma_w]
+            src += chroma_h * chroma_stride
+            dst += chroma_h * chroma_w
+        return i420
+
+    def _to_i420(frame: np.ndarray) -> np.ndarray:
+        if frame.ndim == 2:
+            return _dense_i420(frame)
+        if frame.shape[0] != height or frame.shape[1] != width:
+            frame = cv2.resize(frame, (width, height))
+        return cv2.cvtColor(frame[:, :, :3], cv2.COLOR_BGR2YUV_I420, dst=scratch)
+
+    def _make_converter(sample: np.ndarray):
+        """Wählt die Farbkonvertierung einmal anhand des ersten Frames statt String-Vergleiche pro Frame"""
+        mode = color_convert
+        if mode == "auto":
+            if sample.ndim == 2:
+                mode = "yuv420"
+            elif sample.shape[2] == 4:
+                mode = "bgra2bgr" if pixel_format_upper.startswith(("XBGR", "BGRA")) else "rgba2bgr"
+            else:
+                mode = "none"
+        if mode in ("rgb2bgr", "bgr2rgb"):
+            return lambda frame: frame[:, :, ::-1]
+        code = {
+            "rgba2bgr": cv2.COLOR_RGBA2BGR,
+            "bgra2bgr": cv2.COLOR_BGRA2BGR,
+            "yuv420": cv2.COLOR_YUV2BGR_I420,
+        }.get(mode)
+        if code is not None:
+            return lambda frame: cv2.cvtColor(frame, code, dst=scratch)
         if swap_rb:
-            return frame[:, :, ::-1]
-        return frame
+            return lambda frame: frame[:, :, ::-1]
+        return lambda frame: frame
 
     if test_pattern:
         bars = np.zeros((height, width, 3), dtype=np.uint8)
@@ -169,10 +243,11 @@ def _camera_worker(
         bars[:, bar_w*3:bar_w*4] = (255, 255, 255)
         bars[:, bar_w*4:bar_w*5] = (128, 128, 128)
         bars[:, bar_w*5:] = (0, 0, 0)
-        while not stop_event.is_set():
-            with lock:
-                np.copyto(shared_frame, bars)
-            time.sleep(0.05)
+        if passthrough:
+            bars = _to_i420(bars)
+        # Testbild ist statisch → einmal schreiben statt alle 50 ms kopieren
+        _publish(bars)
+        stop_event.wait()  # schläft bis stop(), kein 50-ms-Polling
         shm.close()
         return
 
@@ -190,19 +265,49 @@ def _camera_worker(
     picam.configure(config)
     picam.start()
 
+    convert = None
+    frames = 0
+    if gc_interval > 0:
+        # Automatischen GC aus, damit keine Pausen mitten im Frame entstehen;
+        # gesammelt wird stattdessen alle gc_interval Frames zwischen zwei Bildern
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+
     try:
         while not stop_event.is_set():
-            frame = picam.capture_array()
-            if frame.shape[0] != height or frame.shape[1] != width:
-                frame = cv2.resize(frame, (width, height))
-            frame = _convert_frame(frame)
-            with lock:
-                np.copyto(shared_frame, frame)
+            if gc_interval > 0:
+                frames += 1
+                if frames % gc_interval == 0:
+                    # meist nur Generation 0, ab und zu voll (sonst bleiben ältere Zyklen liegen)
+                    gc.collect(2 if frames % (gc_interval * 100) == 0 else 0)
+            # Direkt auf den Kamerapuffer zugreifen statt capture_array() (kopiert jedes Mal das ganze Bild)
+            request = picam.capture_request()
+            try:
+                with MappedArray(request, "main") as mapped:
+                    frame = mapped.array
+                    if passthrough:
+                        frame = _to_i420(frame)
+                    else:
+                        # I420 (2D) erst dicht packen, sonst passt das cvtColor-Ergebnis nicht in scratch;
+                        # nur gepackte Bilder skalieren
+                        if frame.ndim == 2:
+                            frame = _dense_i420(frame)
+                        elif frame.shape[0] != height or frame.shape[1] != width:
+                            frame = cv2.resize(frame, (width, height))
+                        if convert is None:
+                            convert = _make_converter(frame)
+                        frame = convert(frame)
+                    _publish(frame)
+            finally:
+                request.release()
     finally:
         try:
             picam.stop()
         except Exception:
             pass
+        if gc_interval > 0:
+            gc.enable()
         shm.close()
 
 
@@ -218,15 +323,20 @@ class CameraProcess:
         swap_rb: bool = False,
         color_convert: str = "auto",
         test_pattern: bool = False,
-        buffer_count: int = 2,
+        buffer_count: int = 4,
         queue: bool = False,
+        cpu: Optional[int] = None,
+        gc_interval: int = 0,
         mp_context: Optional[mp.context.BaseContext] = None,
     ):
         self._width, self._height = target_size
         self._ctx = mp_context or mp.get_context("spawn")
-        self._lock = self._ctx.Lock()
         self._stop_event = self._ctx.Event()
-        self._shm = SharedMemory(create=True, size=self._width * self._height * 3)
+        # Frame-Zähler: zeigt auf den zuletzt fertig geschriebenen Slot, ersetzt den Lock
+        self._frame_seq = self._ctx.Value("Q", 0, lock=False)
+        self._shm = SharedMemory(
+            create=True, size=2 * int(np.prod(_frame_shape(self._width, self._height, frame_format)))
+        )
         self._frame_format = frame_format
         self._proc = self._ctx.Process(
             target=_camera_worker,
@@ -238,34 +348,52 @@ class CameraProcess:
                 max_fps,
                 use_all_cores,
                 pixel_format,
+                frame_format,
                 swap_rb,
                 color_convert,
                 test_pattern,
                 buffer_count,
                 queue,
-                self._lock,
                 self._stop_event,
+                self._frame_seq,
+                cpu,
+                gc_interval,
             ),
         )
         self._proc.daemon = True
         self._proc.start()
+        self._closed = False
+        # Shared Memory auch bei unsauberem Beenden freigeben (deterministisch, nicht im GC)
+        atexit.register(self.stop)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
 
     @property
     def shm_name(self) -> str:
         return self._shm.name
 
     @property
-    def lock(self) -> mp.Lock:
-        return self._lock
+    def frame_seq(self):
+        return self._frame_seq
 
     @property
     def target_size(self) -> Tuple[int, int]:
         return self._width, self._height
 
     def create_track(self):
-        return SharedMemoryCameraStream(self._shm.name, self.target_size, self._lock, self._frame_format)
+        return SharedMemoryCameraStream(
+            self._shm.name, self._frame_seq, self.target_size, self._frame_format
+        )
 
     def stop(self):
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.stop)
         self._stop_event.set()
         if self._proc.is_alive():
             self._proc.join(timeout=2.0)
@@ -282,29 +410,45 @@ class CameraProcess:
             pass
 
 
+def _pull_frame(dst: np.ndarray, slots: np.ndarray, frame_seq, last_seq) -> Tuple[bool, Optional[int]]:
+    """Kopiert das neueste Bild ohne Lock; nur wenn der Worker seit last_seq ein neues veröffentlicht hat"""
+    seq = frame_seq.value
+    if seq == last_seq:
+        return False, last_seq
+    for _ in range(3):
+        np.copyto(dst, slots[seq % 2])
+        current = frame_seq.value
+        if current == seq:
+            return True, seq
+        # Worker schreibt evtl. schon in diesen Slot → den frisch veröffentlichten nehmen
+        seq = current
+    # Keine Kopie bestätigt → last_seq behalten, beim nächsten Aufruf neu versuchen
+    return False, last_seq
+
+
 class SharedMemoryCameraStream(VideoStreamTrack):
     def __init__(
         self,
         shm_name: str,
+        frame_seq,
         target_size=(1280, 720),
-        lock: Optional[mp.Lock] = None,
         frame_format: str = "rgb24",
     ):
         super().__init__()
         width, height = target_size
         self._shm = SharedMemory(name=shm_name)
-        self._lock = lock
+        self._frame_seq = frame_seq
+        self._last_seq = None
         self._frame_format = frame_format
-        self._shared_frame = np.ndarray((height, width, 3), dtype=np.uint8, buffer=self._shm.buf)
-        self._local_frame = np.zeros((height, width, 3), dtype=np.uint8)
+        shape = _frame_shape(width, height, frame_format)
+        self._shared_slots = np.ndarray((2,) + shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._local_frame = np.zeros(shape, dtype=np.uint8)
 
     async def recv(self):
         pts, time_base = await self.next_timestamp()
-        if self._lock:
-            with self._lock:
-                np.copyto(self._local_frame, self._shared_frame)
-        else:
-            np.copyto(self._local_frame, self._shared_frame)
+        _, self._last_seq = _pull_frame(
+            self._local_frame, self._shared_slots, self._frame_seq, self._last_seq
+        )
         frm = VideoFrame.from_ndarray(self._local_frame, format=self._frame_format)
         frm.pts = pts
         frm.time_base = time_base
@@ -323,46 +467,64 @@ class StereoSharedMemoryCameraStream(VideoStreamTrack):
         self,
         left_shm_name: str,
         right_shm_name: str,
+        left_seq,
+        right_seq,
         target_size=(1280, 720),
-        left_lock: Optional[mp.Lock] = None,
-        right_lock: Optional[mp.Lock] = None,
         frame_format: str = "rgb24",
     ):
         super().__init__()
         width, height = target_size
         self._width = width
+        self._height = height
         self._left_shm = SharedMemory(name=left_shm_name)
         self._right_shm = SharedMemory(name=right_shm_name)
-        self._left_lock = left_lock
-        self._right_lock = right_lock
+        self._left_seq = left_seq
+        self._right_seq = right_seq
+        self._left_last = None
+        self._right_last = None
         self._frame_format = frame_format
-        self._left_shared_frame = np.ndarray((height, width, 3), dtype=np.uint8, buffer=self._left_shm.buf)
-        self._right_shared_frame = np.ndarray((height, width, 3), dtype=np.uint8, buffer=self._right_shm.buf)
-        self._left_frame = np.zeros((height, width, 3), dtype=np.uint8)
-        self._right_frame = np.zeros((height, width, 3), dtype=np.uint8)
-        self._stereo_frame = np.zeros((height, width * 2, 3), dtype=np.uint8)
+        shape = _frame_shape(width, height, frame_format)
+        self._left_slots = np.ndarray((2,) + shape, dtype=np.uint8, buffer=self._left_shm.buf)
+        self._right_slots = np.ndarray((2,) + shape, dtype=np.uint8, buffer=self._right_shm.buf)
+        self._left_frame = np.zeros(shape, dtype=np.uint8)
+        self._right_frame = np.zeros(shape, dtype=np.uint8)
+        self._stereo_frame = np.zeros(_frame_shape(width * 2, height, frame_format), dtype=np.uint8)
 
     async def recv(self):
         pts, time_base = await self.next_timestamp()
-        if self._left_lock:
-            with self._left_lock:
-                np.copyto(self._left_frame, self._left_shared_frame)
-        else:
-            np.copyto(self._left_frame, self._left_shared_frame)
-
-        if self._right_lock:
-            with self._right_lock:
-                np.copyto(self._right_frame, self._right_shared_frame)
-        else:
-            np.copyto(self._right_frame, self._right_shared_frame)
-
-        self._stereo_frame[:, :self._width] = self._left_frame
-        self._stereo_frame[:, self._width:] = self._right_frame
+        left_new, self._left_last = _pull_frame(
+            self._left_frame, self._left_slots, self._left_seq, self._left_last
+        )
+        right_new, self._right_last = _pull_frame(
+            self._right_frame, self._right_slots, self._right_seq, self._right_last
+        )
+
+        if left_new:
+            self._place_eye(self._left_frame, 0)
+        if right_new:
+            self._place_eye(self._right_frame, self._width)
         frm = VideoFrame.from_ndarray(self._stereo_frame, format=self._frame_format)
         frm.pts = pts
         frm.time_base = time_base
         return frm
 
+    def _place_eye(self, eye: np.ndarray, x: int):
+        w, h = self._width, self._height
+        if self._frame_format != "yuv420p":
+            self._stereo_frame[:, x:x + w] = eye
+            return
+        # I420: Y-, U- und V-Ebene jeweils einzeln nebeneinander setzen
+        src = eye.reshape(-1)
+        dst = self._stereo_frame.reshape(-1)
+        y_src, y_dst = w * h, 2 * w * h
+        dst[:y_dst].reshape(h, 2 * w)[:, x:x + w] = src[:y_src].reshape(h, w)
+        for plane in range(2):
+            s0 = y_src + plane * (y_src // 4)
+            d0 = y_dst + plane * (y_dst // 4)
+            dst[d0:d0 + y_dst // 4].reshape(h // 2, w)[:, x // 2:(x + w) // 2] = (
+                src[s0:s0 + y_src // 4].reshape(h // 2, w // 2)
+            )
+
     def stop(self):
         super().stop()
         for shm in (self._left_shm, self._right_shm):
@@ -3,14 +3,27 @@
 # 🚀 VR-Racer Backend – Final Stable (2 feste Admins)
 # ======================================================
 
+import asyncio
+import atexit
+import multiprocessing
+import queue
 import sqlite3
 import hashlib
+import hmac
+import json
+import secrets
 import os
 import jwt
-import datetime
-import traceback
+import logging
+import time
 import threading
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Dict, Optional, Tuple
 from aiohttp import web
 from aiortc import RTCPeerConnection, RTCSessionDescription
 from aiortc.contrib.media import MediaRelay
@@ -18,14 +31,66 @@ from camera_stream import CameraProcess, StereoSharedMemoryCameraStream
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # optional, schnellerer JSON-Encoder
+    orjson = None
+
 # ======================================================
 # ⚙️ BASISKONFIGURATION
 # ======================================================
 load_dotenv()
 
+
+def setup_logging():
+    """Log-Ausgabe über eine Queue: Der Aufrufer (Event-Loop) reiht nur ein,
+    geschrieben wird im Thread des QueueListeners."""
+    # Kamera-Prozesse (spawn) importieren server.py neu – dort kein eigener Listener-Thread
+    if multiprocessing.parent_process() is not None:
+        return None
+    root = logging.getLogger()
+    # Schon eingerichtet (z.B. Modul doppelt importiert): keine zweiten Handler
+    listener = getattr(root, "_vr_racer_listener", None)
+    if listener is not None:
+        return listener
+    log_queue = queue.SimpleQueue()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, console, respect_handler_level=True)
+    root.addHandler(QueueHandler(log_queue))
+    root._vr_racer_listener = listener
+    logging.getLogger("vr_racer").setLevel(logging.INFO)
+    listener.start()
+    # Beim Beenden Queue leeren, damit keine Zeilen verloren gehen
+    atexit.register(listener.stop)
+    return listener
+
+
+log_listener = setup_logging()
+
+auth_log = logging.getLogger("vr_racer.auth")
+server_log = logging.getLogger("vr_racer.server")
+camera_log = logging.getLogger("vr_racer.camera")
+
+if orjson is not None:
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+else:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+    json_loads = json.loads
+
+
+def json_response(data, status: int = 200) -> web.Response:
+    """JSON-Antwort direkt als Bytes (orjson, falls installiert)."""
+    return web.Response(body=json_dumps(data), status=status, content_type="application/json")
+
+
 pcs = set()
 relay = MediaRelay()
 camera_manager = None
+token_sweeper_task = None
+shutting_down = False
 
 
 def _parse_size(raw: str, default=(1280, 720)):
@@ -80,7 +145,7 @@ CAMERA_MAX_FPS = os.getenv("CAMERA_MAX_FPS")
 CAMERA_MAX_FPS = float(CAMERA_MAX_FPS) if CAMERA_MAX_FPS else None
 CAMERA_USE_ALL_CORES = _parse_bool(os.getenv("CAMERA_USE_ALL_CORES", "1"), True)
 CAMERA_SWAP_RB = _parse_bool(os.getenv("CAMERA_SWAP_RB", "0"), False)
-CAMERA_BUFFER_COUNT = int(os.getenv("CAMERA_BUFFER_COUNT", "2"))
+CAMERA_BUFFER_COUNT = int(os.getenv("CAMERA_BUFFER_COUNT", "4"))
 CAMERA_QUEUE = _parse_bool(os.getenv("CAMERA_QUEUE", "0"), False)
 CAMERA_PIXEL_FORMAT = os.getenv("CAMERA_FORMAT", "RGB888")
 CAMERA_FRAME_FORMAT = os.getenv("VIDEO_FRAME_FORMAT", "rgb24")
@@ -88,6 +153,13 @@ CAMERA_COLOR_CONVERT = os.getenv("CAMERA_COLOR_CONVERT", "auto")
 CAMERA_TEST_PATTERN = _parse_bool(os.getenv("CAMERA_TEST_PATTERN", "0"), False)
 CAMERA_RIGHT_INDEX = int(os.getenv("CAMERA_RIGHT_INDEX", "0"))
 CAMERA_LEFT_INDEX = int(os.getenv("CAMERA_LEFT_INDEX", "1"))
+# Optional: Capture-Prozess pro Kamera auf einen CPU-Kern pinnen (leer = Scheduler entscheidet)
+CAMERA_RIGHT_CPU = os.getenv("CAMERA_RIGHT_CPU")
+CAMERA_RIGHT_CPU = int(CAMERA_RIGHT_CPU) if CAMERA_RIGHT_CPU else None
+CAMERA_LEFT_CPU = os.getenv("CAMERA_LEFT_CPU")
+CAMERA_LEFT_CPU = int(CAMERA_LEFT_CPU) if CAMERA_LEFT_CPU else None
+# Optional: automatischen GC im Capture-Prozess aus, manuell alle N Frames sammeln (0 = normaler GC)
+CAMERA_GC_INTERVAL = _parse_int(os.getenv("CAMERA_GC_INTERVAL"), 0)
 WEBRTC_VIDEO_BITRATE_KBPS = _parse_int(os.getenv("WEBRTC_VIDEO_BITRATE_KBPS"), 2500)
 WEBRTC_VR_VIDEO_BITRATE_KBPS = _parse_int(os.getenv("WEBRTC_VR_VIDEO_BITRATE_KBPS"), 7000)
 
@@ -138,13 +210,12 @@ class CameraManager:
         self._vr_clients = 0
         self._manual_second_camera_enabled = False
 
-        print(
-            f"🎥 Camera cfg: size={target_size[0]}x{target_size[1]} "
-            f"fmt={CAMERA_PIXEL_FORMAT} frame={CAMERA_FRAME_FORMAT} "
-            f"swap_rb={int(CAMERA_SWAP_RB)} buffers={CAMERA_BUFFER_COUNT} "
-            f"queue={int(CAMERA_QUEUE)} max_fps={CAMERA_MAX_FPS} "
-            f"convert={CAMERA_COLOR_CONVERT} test={int(CAMERA_TEST_PATTERN)} "
-            f"right_idx={CAMERA_RIGHT_INDEX} left_idx={CAMERA_LEFT_INDEX}"
+        camera_log.info(
+            "🎥 Camera cfg: size=%dx%d fmt=%s frame=%s swap_rb=%d buffers=%d "
+            "queue=%d max_fps=%s convert=%s test=%d right_idx=%d left_idx=%d",
+            target_size[0], target_size[1], CAMERA_PIXEL_FORMAT, CAMERA_FRAME_FORMAT,
+            CAMERA_SWAP_RB, CAMERA_BUFFER_COUNT, CAMERA_QUEUE, CAMERA_MAX_FPS,
+            CAMERA_COLOR_CONVERT, CAMERA_TEST_PATTERN, CAMERA_RIGHT_INDEX, CAMERA_LEFT_INDEX,
         )
         self.camera_right_proc = CameraProcess(
             camera_index=CAMERA_RIGHT_INDEX,
@@ -158,6 +229,8 @@ class CameraManager:
             test_pattern=CAMERA_TEST_PATTERN,
             buffer_count=CAMERA_BUFFER_COUNT,
             queue=CAMERA_QUEUE,
+            cpu=CAMERA_RIGHT_CPU,
+            gc_interval=CAMERA_GC_INTERVAL,
         )
         self.camera_right_track = self.camera_right_proc.create_track()
 
@@ -179,6 +252,8 @@ class CameraManager:
             test_pattern=CAMERA_TEST_PATTERN,
             buffer_count=CAMERA_BUFFER_COUNT,
             queue=CAMERA_QUEUE,
+            cpu=CAMERA_LEFT_CPU,
+            gc_interval=CAMERA_GC_INTERVAL,
         )
         self.camera_left_track = self.camera_left_proc.create_track()
 
@@ -210,27 +285,32 @@ class CameraManager:
 
     def get_tracks(self, vr_mode: bool):
         if not vr_mode:
+            # Attribut-Lesen ist unter dem GIL atomar → kein Lock nötig
             return [self._relay.subscribe(self.camera_right_track)]
-        if self.camera_left_proc is None:
+        # Beide Prozesse einmal gemeinsam lesen, damit release_vr() nicht dazwischen stoppt
+        with self._lock:
+            left, right = self.camera_left_proc, self.camera_right_proc
+        if left is None or right is None:
             raise RuntimeError("Kamera links ist nicht verfügbar")
         stereo_track = StereoSharedMemoryCameraStream(
-            self.camera_left_proc.shm_name,
-            self.camera_right_proc.shm_name,
+            left.shm_name,
+            right.shm_name,
+            left.frame_seq,
+            right.frame_seq,
             self._target_size,
-            self.camera_left_proc.lock,
-            self.camera_right_proc.lock,
             CAMERA_FRAME_FORMAT,
         )
         return [stereo_track]
 
     def stop_all(self):
-        if self.camera_right_proc:
-            self.camera_right_proc.stop()
-            self.camera_right_proc = None
-        if self.camera_left_proc:
-            self.camera_left_proc.stop()
-            self.camera_left_proc = None
-        self.camera_left_track = None
+        with self._lock:
+            if self.camera_right_proc:
+                self.camera_right_proc.stop()
+                self.camera_right_proc = None
+            if self.camera_left_proc:
+                self.camera_left_proc.stop()
+                self.camera_left_proc = None
+            self.camera_left_track = None
 
 
 
@@ -239,6 +319,12 @@ KEY_FILE = "secret.key"
 
 JWT_SECRET = os.getenv("JWT_SECRET", "fallback_secret_key")
 JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "60"))
+# 0 = Admin-Tokens laufen nie ab (kein exp-Claim)
+JWT_ADMIN_EXPIRE_MINUTES = int(os.getenv("JWT_ADMIN_EXPIRE_MINUTES", str(JWT_EXPIRE_MINUTES)))
+if JWT_ADMIN_EXPIRE_MINUTES < 0:
+    # Tippfehler wie -5 dürfen nicht still zu unbegrenzten Admin-Tokens führen
+    auth_log.warning("⚠️ JWT_ADMIN_EXPIRE_MINUTES=%d ungültig – nutze %d", JWT_ADMIN_EXPIRE_MINUTES, JWT_EXPIRE_MINUTES)
+    JWT_ADMIN_EXPIRE_MINUTES = JWT_EXPIRE_MINUTES
 ADMIN_G_PASS = os.getenv("ADMIN_G_PASS", "admin123")
 ADMIN_D_PASS = os.getenv("ADMIN_D_PASS", "admin123")
 
@@ -247,7 +333,7 @@ def configure_multicore():
     cpu_count = os.cpu_count() or 1
     try:
         os.sched_setaffinity(0, set(range(cpu_count)))
-        print(f"⚙️ CPU-Affinität gesetzt: {cpu_count} Kerne")
+        server_log.info("⚙️ CPU-Affinität gesetzt: %d Kerne", cpu_count)
     except (AttributeError, PermissionError, OSError):
         pass
 
@@ -255,8 +341,64 @@ def configure_multicore():
 # 🔐 HASH & VERSCHLÜSSELUNG
 # ======================================================
 
-def hash_pw(password: str) -> str:
-    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_DKLEN = 32
+SCRYPT_PREFIX = f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$"
+
+def hash_pw(password: str) -> Tuple[str, bytes]:
+    """scrypt-Hash im Format scrypt$n$r$p$hash, Salt (16 Byte roh) separat als BLOB"""
+    salt = secrets.token_bytes(16)
+    dk = hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=SCRYPT_DKLEN
+    )
+    return f"{SCRYPT_PREFIX}{dk.hex()}", salt
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> Tuple[str, bytes]:
+    """Platzhalter-Hash: unbekannte Benutzer kosten dieselbe scrypt-Zeit wie echte (kein Timing-Leak).
+    Erst beim ersten Login erzeugt, nicht beim Import (Kamera-Prozesse importieren server.py per spawn neu)"""
+    return hash_pw(secrets.token_hex(16))
+
+def _burn_scrypt(pw: bytes) -> bool:
+    hashlib.scrypt(pw, salt=_dummy_hash()[1], n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=SCRYPT_DKLEN)
+    return False
+
+def verify_pw(password: str, pw_hash: str, salt: Optional[bytes] = None) -> bool:
+    # Passwort nur einmal kodieren; Vergleich auf den rohen Digest-Bytes statt auf Hex-Strings
+    pw = password.encode("utf-8")
+    if pw_hash.startswith("scrypt$"):
+        try:
+            parts = pw_hash.split("$")
+            if len(parts) == 6:
+                # Älteres Format: Hex-Salt steht noch im Hash-String
+                _, n, r, p, inline_salt, expected = parts
+                salt = inline_salt.encode("ascii")
+            else:
+                _, n, r, p, expected = parts
+                if salt is None:
+                    return _burn_scrypt(pw)
+            expected = bytes.fromhex(expected)
+            dk = hashlib.scrypt(
+                pw, salt=salt, n=int(n), r=int(r), p=int(p), dklen=len(expected)
+            )
+        except ValueError:
+            # Kaputter Hash → trotzdem volle Rechenzeit, kein früher Ausstieg
+            return _burn_scrypt(pw)
+        return hmac.compare_digest(dk, expected)
+    # Altes Format: ungesalzenes SHA-256 – wird beim nächsten Login auf scrypt umgestellt
+    try:
+        expected = bytes.fromhex(pw_hash)
+    except ValueError:
+        return _burn_scrypt(pw)
+    ok = hmac.compare_digest(hashlib.sha256(pw).digest(), expected)
+    # Auch hier eine volle scrypt-Runde, sonst verrät die Antwortzeit, dass das Konto existiert
+    _burn_scrypt(pw)
+    return ok
+
+def needs_rehash(pw_hash: str, salt: Optional[bytes]) -> bool:
+    return salt is None or not pw_hash.startswith(SCRYPT_PREFIX)
 
 def load_key() -> bytes:
     """Erzeugt automatisch einen neuen Key, wenn keiner vorhanden ist"""
@@ -267,38 +409,108 @@ def load_key() -> bytes:
         key = Fernet.generate_key()
         with open(KEY_FILE, "wb") as f:
             f.write(key)
-        print("🔐 Neuer Encryption-Key erzeugt:", KEY_FILE)
+        auth_log.info("🔐 Neuer Encryption-Key erzeugt: %s", KEY_FILE)
         return key
 
-fernet = Fernet(load_key())
+ENCRYPTION_KEY = load_key()
+fernet = Fernet(ENCRYPTION_KEY)
+
+def name_key(username: str) -> bytes:
+    """Deterministischer Lookup-Schlüssel für den (verschlüsselten) Benutzernamen (BLAKE2b-128, keyed)"""
+    return hashlib.blake2b(username.lower().encode("utf-8"), digest_size=16, key=ENCRYPTION_KEY).digest()
 
 # ======================================================
 # 🗄️ DATENBANK
 # ======================================================
 
+_db_local = threading.local()
+_write_lock = threading.Lock()
+_write_conn: Optional[sqlite3.Connection] = None
+
+def _connect(isolation_level: Optional[str] = "") -> sqlite3.Connection:
+    # Großer Statement-Cache: gleiche SQL-Strings werden nur einmal vorbereitet
+    conn = sqlite3.connect(
+        DB_PATH, check_same_thread=False, isolation_level=isolation_level, cached_statements=256
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=134217728")
+    return conn
+
+def get_db() -> sqlite3.Connection:
+    """Liefert eine wiederverwendete Lese-Verbindung pro Thread (statt connect/close pro Aufruf)"""
+    conn = getattr(_db_local, "conn", None)
+    if conn is None:
+        conn = _db_local.conn = _connect()
+        # Reine Leseverbindung mit eigenem Page-Cache (8 MiB) → Lookups bleiben im RAM statt auf der SD-Karte
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute("PRAGMA cache_size=-8192")
+    return conn
+
+@contextmanager
+def write_tx():
+    """Schreibtransaktion auf der einen, langlebigen Schreibverbindung (BEGIN IMMEDIATE)"""
+    global _write_conn
+    with _write_lock:
+        if _write_conn is None:
+            _write_conn = _connect(isolation_level=None)
+            # Gelöschte Seiten nicht überschreiben; Dateisperre nach jeder Transaktion freigeben (Leser im WAL)
+            _write_conn.execute("PRAGMA secure_delete=OFF")
+            _write_conn.execute("PRAGMA locking_mode=NORMAL")
+        _write_conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield _write_conn
+        except BaseException:
+            _write_conn.execute("ROLLBACK")
+            raise
+        _write_conn.execute("COMMIT")
+
 def ensure_is_admin_column(c: sqlite3.Cursor):
     try:
         c.execute("SELECT is_admin FROM users LIMIT 1")
     except sqlite3.OperationalError:
         c.execute("ALTER TABLE users ADD COLUMN is_admin INTEGER DEFAULT 0")
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+def ensure_username_key_column(c: sqlite3.Cursor):
     try:
-        c.execute("PRAGMA journal_mode=WAL")
-    except Exception:
-        pass
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            is_admin INTEGER DEFAULT 0
-        )
-    """)
-    ensure_is_admin_column(c)
-    conn.commit()
+        c.execute("SELECT username_key FROM users LIMIT 1")
+    except sqlite3.OperationalError:
+        c.execute("ALTER TABLE users ADD COLUMN username_key BLOB")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username_key ON users(username_key)")
+
+    # Fehlende bzw. alte (HMAC-SHA256-Hex) Schlüssel einmalig nachtragen
+    c.execute("SELECT id, username FROM users WHERE username_key IS NULL OR typeof(username_key) != 'blob'")
+    for uid, enc_name in c.fetchall():
+        try:
+            name = fernet.decrypt(enc_name.encode()).decode()
+            c.execute("UPDATE users SET username_key = ? WHERE id = ?", (name_key(name), uid))
+        except Exception:
+            continue
+
+def ensure_password_salt_column(c: sqlite3.Cursor):
+    # Alte Zeilen behalten NULL – sie werden beim nächsten Login neu gehasht
+    try:
+        c.execute("SELECT password_salt FROM users LIMIT 1")
+    except sqlite3.OperationalError:
+        c.execute("ALTER TABLE users ADD COLUMN password_salt BLOB")
+
+def init_db():
+    with write_tx() as conn:
+        c = conn.cursor()
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                username_key BLOB,
+                password_hash TEXT NOT NULL,
+                password_salt BLOB,
+                is_admin INTEGER DEFAULT 0
+            )
+        """)
+        ensure_is_admin_column(c)
+        ensure_username_key_column(c)
+        ensure_password_salt_column(c)
 
     # 🔐 Admins aus .env laden
     admins = {
@@ -306,180 +518,230 @@ def init_db():
         "Admin_D": ADMIN_D_PASS
     }
 
-    # Bestehende User abrufen
-    c.execute("SELECT username FROM users")
-    rows = c.fetchall()
-    existing_names = set()
-
-    for (enc_name,) in rows:
-        try:
-            name = fernet.decrypt(enc_name.encode()).decode()
-            existing_names.add(name)
-        except Exception:
-            continue
+    # ⚡ Schnellpfad: beide Admins vorhanden → eine Abfrage, kein Hashing
+    keys = [name_key(name) for name in admins]
+    count = get_db().execute(
+        "SELECT COUNT(*) FROM users WHERE username_key IN (?, ?)", keys
+    ).fetchone()[0]
+    if count == len(admins):
+        auth_log.info("✅ Datenbank initialisiert: %s (Admins vorhanden)", DB_PATH)
+        return
 
     # 🔁 Admins hinzufügen, wenn sie fehlen
+    missing = []
     for name, pw in admins.items():
         if not pw:
-            print(f"⚠️ Kein Passwort für {name} in .env gefunden – wird übersprungen.")
+            auth_log.warning("⚠️ Kein Passwort für %s in .env gefunden – wird übersprungen.", name)
             continue
-        if name not in existing_names:
-            enc_user = fernet.encrypt(name.encode()).decode()
-            c.execute(
-                "INSERT INTO users (username, password_hash, is_admin) VALUES (?, ?, 1)",
-                (enc_user, hash_pw(pw)),
-            )
-            print(f"👑 Admin '{name}' neu erstellt.")
+        if not username_exists(name):
+            missing.append((name, pw, True))
         else:
-            print(f"✅ Admin '{name}' existiert bereits – wird nicht neu erstellt.")
+            auth_log.info("✅ Admin '%s' existiert bereits – wird nicht neu erstellt.", name)
 
-    conn.commit()
-    conn.close()
-    print(f"✅ Datenbank initialisiert: {DB_PATH}")
+    create_users_batch(missing)
+    for name, _, _ in missing:
+        auth_log.info("👑 Admin '%s' neu erstellt.", name)
+    auth_log.info("✅ Datenbank initialisiert: %s", DB_PATH)
 
 # ======================================================
 # 👥 BENUTZERFUNKTIONEN
 # ======================================================
 
 def username_exists(username: str) -> bool:
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT username FROM users")
-    rows = c.fetchall()
-    conn.close()
-    for (enc_name,) in rows:
-        try:
-            if fernet.decrypt(enc_name.encode()).decode().lower() == username.lower():
-                return True
-        except Exception:
-            pass
-    return False
+    row = get_db().execute("SELECT 1 FROM users WHERE username_key = ?", (name_key(username),)).fetchone()
+    return row is not None
 
 def create_user(username: str, password: str) -> bool:
-    if username_exists(username):
-        return False
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    try:
-        enc = fernet.encrypt(username.encode()).decode()
-        c.execute(
-            "INSERT INTO users (username, password_hash, is_admin) VALUES (?, ?, 0)",
-            (enc, hash_pw(password)),
+    enc = fernet.encrypt(username.encode()).decode()
+    pw_hash, salt = hash_pw(password)
+    with write_tx() as conn:
+        c = conn.execute(
+            "INSERT INTO users (username, username_key, password_hash, password_salt, is_admin) "
+            "VALUES (?, ?, ?, ?, 0) ON CONFLICT(username_key) DO NOTHING",
+            (enc, name_key(username), pw_hash, salt),
         )
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-    finally:
-        conn.close()
+    return c.rowcount == 1
+
+def create_users_batch(users: List[Tuple[str, str, bool]]) -> int:
+    """Legt mehrere Benutzer (name, passwort, admin) in einer Transaktion an"""
+    if not users:
+        return 0
+    # hashlib.scrypt gibt den GIL frei → Hashes laufen echt parallel
+    with ThreadPoolExecutor(max_workers=min(len(users), os.cpu_count() or 1)) as pool:
+        hashes = list(pool.map(hash_pw, [pw for _, pw, _ in users]))
+    rows = [
+        (fernet.encrypt(name.encode()).decode(), name_key(name), pw_hash, salt, int(is_admin))
+        for (name, _, is_admin), (pw_hash, salt) in zip(users, hashes)
+    ]
+    with write_tx() as conn:
+        c = conn.executemany(
+            "INSERT INTO users (username, username_key, password_hash, password_salt, is_admin) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT(username_key) DO NOTHING",
+            rows,
+        )
+    return c.rowcount
 
 def check_user(username: str, password: str) -> Dict[str, bool]:
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT username, password_hash, is_admin FROM users")
-    rows = c.fetchall()
-    conn.close()
-    for enc_name, pw_hash, is_admin in rows:
-        try:
-            if fernet.decrypt(enc_name.encode()).decode() == username and pw_hash == hash_pw(password):
-                return {"ok": True, "admin": bool(is_admin)}
-        except Exception:
-            continue
-    return {"ok": False, "admin": False}
-
-def get_all_users() -> List[Dict]:
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id, username, is_admin FROM users ORDER BY id ASC")
-    rows = c.fetchall()
-    conn.close()
-    users = []
-    for uid, enc_name, is_admin in rows:
-        try:
-            name = fernet.decrypt(enc_name.encode()).decode()
-        except Exception:
-            name = "⚠️ Unlesbar"
-        users.append({"id": uid, "username": name, "is_admin": bool(is_admin)})
-    return users
-
-def delete_user(user_id: int) -> bool:
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT username, is_admin FROM users WHERE id = ?", (user_id,))
-    row = c.fetchone()
+    row = get_db().execute(
+        "SELECT id, username, password_hash, password_salt, is_admin FROM users WHERE username_key = ?",
+        (name_key(username),),
+    ).fetchone()
     if not row:
-        conn.close()
-        return False
+        verify_pw(password, *_dummy_hash())
+        return {"ok": False, "admin": False}
+
+    uid, enc_name, pw_hash, salt, is_admin = row
+    try:
+        # Schlüssel ist case-insensitiv, der Login bleibt case-sensitiv
+        name_ok = fernet.decrypt(enc_name.encode()).decode() == username
+    except Exception:
+        name_ok = False
+    if not name_ok:
+        verify_pw(password, *_dummy_hash())
+        return {"ok": False, "admin": False}
+
+    if not verify_pw(password, pw_hash, salt):
+        return {"ok": False, "admin": False}
+    if needs_rehash(pw_hash, salt):
+        new_hash, new_salt = hash_pw(password)
+        with write_tx() as conn:
+            conn.execute(
+                "UPDATE users SET password_hash = ?, password_salt = ? WHERE id = ?",
+                (new_hash, new_salt, uid),
+            )
+    return {"ok": True, "admin": bool(is_admin)}
 
-    enc_name, is_admin = row
+def _decrypt_name(enc_name: str) -> str:
     try:
-        name = fernet.decrypt(enc_name.encode()).decode()
+        return fernet.decrypt(enc_name.encode()).decode()
     except Exception:
-        name = ""
+        return "⚠️ Unlesbar"
+
+def get_all_users(limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+    c = get_db().execute(
+        "SELECT id, username, is_admin FROM users ORDER BY id ASC LIMIT ? OFFSET ?",
+        (limit if limit else -1, offset),
+    )
+    return [
+        {"id": uid, "username": _decrypt_name(enc_name), "is_admin": bool(is_admin)}
+        for uid, enc_name, is_admin in c
+    ]
+
+def delete_user(user_id: int) -> bool:
+    with write_tx() as conn:
+        row = conn.execute("SELECT username, is_admin FROM users WHERE id = ?", (user_id,)).fetchone()
+        if not row:
+            return False
 
-    # Admins dürfen nicht gelöscht werden
-    if name in ("Admin_G", "Admin_D") or is_admin == 1:
-        conn.close()
-        print(f"🚫 Versuch, Admin '{name}' zu löschen – blockiert.")
-        return False
+        enc_name, is_admin = row
+        try:
+            name = fernet.decrypt(enc_name.encode()).decode()
+        except Exception:
+            name = ""
 
-    c.execute("DELETE FROM users WHERE id = ?", (user_id,))
-    conn.commit()
-    deleted = c.rowcount > 0
-    conn.close()
-    return deleted
+        # Admins dürfen nicht gelöscht werden
+        if name in ("Admin_G", "Admin_D") or is_admin == 1:
+            auth_log.warning("🚫 Versuch, Admin '%s' zu löschen – blockiert.", name)
+            return False
+
+        c = conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+    return c.rowcount > 0
 
 def update_user(user_id: int, new_username: Optional[str], new_password: Optional[str]) -> (bool, str):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT username, is_admin FROM users WHERE id = ?", (user_id,))
-    row = c.fetchone()
-    if not row:
-        conn.close()
-        return False, "not_found"
+    # Teure Arbeit (scrypt, Fernet) vor der Schreibsperre erledigen
+    enc = fernet.encrypt(new_username.encode()).decode() if new_username else None
+    pw_hash, salt = hash_pw(new_password) if new_password else (None, None)
 
-    enc_name, is_admin = row
     try:
-        name = fernet.decrypt(enc_name.encode()).decode()
-    except Exception:
-        name = ""
-
-    # Admins sperren
-    if name in ("Admin_G", "Admin_D") or is_admin == 1:
-        conn.close()
-        print(f"🚫 Versuch, Admin '{name}' zu ändern – blockiert.")
-        return False, "admin_locked"
-
-    if new_username:
-        if username_exists(new_username):
-            conn.close()
-            return False, "name_exists"
-        enc = fernet.encrypt(new_username.encode()).decode()
-        c.execute("UPDATE users SET username = ? WHERE id = ?", (enc, user_id))
-
-    if new_password:
-        c.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hash_pw(new_password), user_id))
-
-    conn.commit()
-    conn.close()
+        with write_tx() as conn:
+            row = conn.execute("SELECT username, is_admin FROM users WHERE id = ?", (user_id,)).fetchone()
+            if not row:
+                return False, "not_found"
+
+            enc_name, is_admin = row
+            try:
+                name = fernet.decrypt(enc_name.encode()).decode()
+            except Exception:
+                name = ""
+
+            # Admins sperren
+            if name in ("Admin_G", "Admin_D") or is_admin == 1:
+                auth_log.warning("🚫 Versuch, Admin '%s' zu ändern – blockiert.", name)
+                return False, "admin_locked"
+
+            if enc:
+                conn.execute(
+                    "UPDATE users SET username = ?, username_key = ? WHERE id = ?",
+                    (enc, name_key(new_username), user_id),
+                )
+            if pw_hash:
+                conn.execute(
+                    "UPDATE users SET password_hash = ?, password_salt = ? WHERE id = ?",
+                    (pw_hash, salt, user_id),
+                )
+    except sqlite3.IntegrityError:
+        return False, "name_exists"
     return True, "ok"
 
 # ======================================================
 # 🔑 JWT AUTHENTIFIZIERUNG
 # ======================================================
 
+def token_ttl(is_admin: bool) -> Optional[int]:
+    """Gültigkeit in Sekunden, None = unbegrenzt (nur Admins mit JWT_ADMIN_EXPIRE_MINUTES=0)"""
+    if is_admin:
+        return None if JWT_ADMIN_EXPIRE_MINUTES == 0 else JWT_ADMIN_EXPIRE_MINUTES * 60
+    return JWT_EXPIRE_MINUTES * 60
+
 def create_token(username: str, is_admin: bool) -> str:
-    exp = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=JWT_EXPIRE_MINUTES)
-    payload = {"user": username, "is_admin": is_admin, "exp": exp}
+    payload = {"user": username, "is_admin": is_admin}
+    ttl = token_ttl(is_admin)
+    if ttl is not None:
+        # exp als Unix-Zeitstempel (int) – spart datetime-Objekte beim Erzeugen
+        payload["exp"] = int(time.time()) + ttl
     token = jwt.encode(payload, JWT_SECRET, algorithm="HS256")
     return token if isinstance(token, str) else token.decode("utf-8")
 
+TOKEN_CACHE_SIZE = 1024
+TOKEN_SWEEP_INTERVAL = 300
+_token_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
 def decode_token(token: str):
+    """Prüft den JWT; bereits verifizierte Tokens kommen bis zum Ablauf aus dem LRU-Cache"""
+    with _token_cache_lock:
+        data = _token_cache.get(token)
+        if data is not None:
+            exp = data.get("exp")
+            if exp is None or time.time() < exp:
+                _token_cache.move_to_end(token)
+                return data
+    # Abgelaufene Einträge räumt sweep_token_cache() im Hintergrund weg
+
     try:
-        return jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+        data = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         return None
 
+    with _token_cache_lock:
+        _token_cache[token] = data
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return data
+
+def sweep_token_cache() -> int:
+    now = time.time()
+    with _token_cache_lock:
+        expired = [tkn for tkn, data in _token_cache.items() if data.get("exp") is not None and data["exp"] <= now]
+        for tkn in expired:
+            del _token_cache[tkn]
+    return len(expired)
+
+async def token_sweeper():
+    while True:
+        await asyncio.sleep(TOKEN_SWEEP_INTERVAL)
+        sweep_token_cache()
+
 def require_auth(request: web.Request, admin_required: bool = False):
     auth = request.headers.get("Authorization", "")
     if not auth.startswith("Bearer "):
@@ -492,30 +754,43 @@ def require_auth(request: web.Request, admin_required: bool = False):
         return None
     return data
 
+# scrypt + SQLite blockieren → eigener Thread-Pool statt Event-Loop
+auth_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="auth")
+
+async def run_auth(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(auth_executor, func, *args)
+
+# Kamera-Prozesse starten/stoppen (spawn, join bis 2 s) → ebenfalls raus aus dem Event-Loop.
+# Ein Worker reicht: CameraManager serialisiert ohnehin über seinen Lock.
+camera_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera")
+
+async def run_camera(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(camera_executor, func, *args)
+
 # ======================================================
 # 🌐 API-ENDPUNKTE
 # ======================================================
 
 async def login(request: web.Request) -> web.Response:
-    data = await request.json()
+    data = await request.json(loads=json_loads)
     username = data.get("username", "")
     password = data.get("password", "")
-    result = check_user(username, password)
+    result = await run_auth(check_user, username, password)
     if result["ok"]:
         token = create_token(username, result["admin"])
-        return web.json_response({
+        return json_response({
             "token": token,
-            "expires_in": JWT_EXPIRE_MINUTES * 60
+            "expires_in": token_ttl(result["admin"])
         }, status=202 if result["admin"] else 200)
     return web.Response(status=403, text="Wrong credentials")
 
 async def register(request: web.Request) -> web.Response:
-    data = await request.json()
+    data = await request.json(loads=json_loads)
     username = data.get("username", "")
     password = data.get("password", "")
-    if username_exists(username):
+    if await run_auth(username_exists, username):
         return web.Response(status=409, text="User exists")
-    if create_user(username, password):
+    if await run_auth(create_user, username, password):
         return web.Response(status=200, text="User created")
     return web.Response(status=500, text="Error creating user")
 
@@ -528,12 +803,12 @@ async def camera_second(request: web.Request) -> web.Response:
         return web.Response(status=401, text="Unauthorized")
 
     try:
-        data = await request.json()
+        data = await request.json(loads=json_loads)
         enabled = bool(data.get("enabled", False))
-        camera_manager.set_second_camera(enabled)
-        return web.json_response({"enabled": enabled})
+        await run_camera(camera_manager.set_second_camera, enabled)
+        return json_response({"enabled": enabled})
     except Exception:
-        print("💥 [/camera/second] Fehler:\n" + traceback.format_exc())
+        server_log.exception("💥 [/camera/second] Fehler")
         return web.Response(status=500, text="Camera switch error")
 
 async def offer(request: web.Request) -> web.Response:
@@ -542,10 +817,10 @@ async def offer(request: web.Request) -> web.Response:
         return web.Response(status=401, text="Unauthorized")
 
     try:
-        params = await request.json()
+        params = await request.json(loads=json_loads)
         vr_mode = bool(params.get("vr", False))
         client_profile = _select_client_profile(params.get("clientProfile"), vr_mode)
-        print(f"📐 Client-Profil: {client_profile}")
+        server_log.info("📐 Client-Profil: %s", client_profile)
         if "sdp" not in params or "type" not in params:
             return web.Response(status=400, text="Missing SDP offer")
         offer = RTCSessionDescription(sdp=params["sdp"], type=params["type"])
@@ -554,14 +829,16 @@ async def offer(request: web.Request) -> web.Response:
         pc.is_vr = vr_mode
 
         if vr_mode:
-            camera_manager.acquire_vr()
+            await run_camera(camera_manager.acquire_vr)
 
         @pc.on("connectionstatechange")
         async def on_state_change():
             if pc.connectionState in ("failed", "closed", "disconnected"):
                 await pc.close()
-                if getattr(pc, "is_vr", False):
-                    camera_manager.release_vr()
+                # Beim Herunterfahren stoppt on_shutdown die Kameras selbst,
+                # der Kamera-Executor nimmt dann keine Aufträge mehr an
+                if getattr(pc, "is_vr", False) and not shutting_down:
+                    await run_camera(camera_manager.release_vr)
                 pcs.discard(pc)
 
         await pc.setRemoteDescription(offer)
@@ -574,15 +851,15 @@ async def offer(request: web.Request) -> web.Response:
             type=answer.type,
         )
         await pc.setLocalDescription(answer)
-        print(f"🎚️ WebRTC Video-Bitrate: {target_bitrate} kbit/s ({'vr' if vr_mode else 'normal'})")
-        return web.json_response({
+        server_log.info("🎚️ WebRTC Video-Bitrate: %s kbit/s (%s)", target_bitrate, "vr" if vr_mode else "normal")
+        return json_response({
             "sdp": pc.localDescription.sdp,
             "type": pc.localDescription.type
         })
     except Exception:
-        print("💥 [offer] Fehler:\n" + traceback.format_exc())
+        server_log.exception("💥 [offer] Fehler")
         if 'vr_mode' in locals() and vr_mode:
-            camera_manager.release_vr()
+            await run_camera(camera_manager.release_vr)
         return web.Response(status=500, text="Offer error")
 
 # ======================================================
@@ -594,33 +871,38 @@ async def admin_users(request: web.Request) -> web.Response:
     if not auth_data:
         return web.Response(status=401, text="Unauthorized")
     try:
-        users = get_all_users()
-        return web.json_response(users)
+        # Optionale Seitenweise Abfrage: /admin/users?limit=50&offset=100
+        limit = _parse_int(request.query.get("limit"), 0) or None
+        offset = _parse_int(request.query.get("offset"), 0)
+        users = await run_auth(get_all_users, limit, offset)
+        return json_response(users)
     except Exception:
-        print("💥 Fehler bei /admin/users:\n" + traceback.format_exc())
+        server_log.exception("💥 Fehler bei /admin/users")
         return web.Response(status=500, text="Server error")
 
 async def admin_delete(request: web.Request) -> web.Response:
     if not require_auth(request, admin_required=True):
         return web.Response(status=401, text="Unauthorized")
-    data = await request.json()
+    data = await request.json(loads=json_loads)
     user_id = data.get("id")
     if user_id is None:
         return web.Response(status=400, text="Invalid request")
-    if delete_user(int(user_id)):
+    if await run_auth(delete_user, int(user_id)):
         return web.Response(status=200, text="User deleted")
     return web.Response(status=404, text="User not found or admin")
 
 async def admin_update(request: web.Request) -> web.Response:
     if not require_auth(request, admin_required=True):
         return web.Response(status=401, text="Unauthorized")
-    data = await request.json()
+    data = await request.json(loads=json_loads)
     user_id = data.get("id")
     new_name = (data.get("username") or "").strip()
     new_pass = (data.get("password") or "").strip()
     if user_id is None or (not new_name and not new_pass):
         return web.Response(status=400, text="Invalid request")
-    ok, reason = update_user(int(user_id), new_name if new_name else None, new_pass if new_pass else None)
+    ok, reason = await run_auth(
+        update_user, int(user_id), new_name if new_name else None, new_pass if new_pass else None
+    )
     if ok:
         return web.Response(status=200, text="Updated")
     if reason == "admin_locked":
@@ -633,23 +915,42 @@ async def admin_update(request: web.Request) -> web.Response:
 # 🌍 ROUTEN UND SERVER-SETUP
 # ======================================================
 
+# Pfade einmal anlegen statt bei jedem Request neu zu parsen
+INDEX_HTML = Path("templates/index1.html")
+DASHBOARD_HTML = Path("templates/dashboard.html")
+CLIENT_JS = Path("static/js/client1.js")
+STATIC_DIR = Path("static")
+
 async def index(request: web.Request) -> web.Response:
-    return web.FileResponse("templates/index1.html")
+    return web.FileResponse(INDEX_HTML)
 
 async def javascript(request: web.Request) -> web.Response:
-    return web.FileResponse("static/js/client1.js")
+    return web.FileResponse(CLIENT_JS)
 
 async def dashboard(request: web.Request) -> web.Response:
-    return web.FileResponse("templates/dashboard.html")
+    return web.FileResponse(DASHBOARD_HTML)
+
+async def on_startup(app: web.Application):
+    global token_sweeper_task
+    token_sweeper_task = asyncio.create_task(token_sweeper())
 
 async def on_shutdown(app: web.Application):
+    global shutting_down
+    shutting_down = True
+    if token_sweeper_task:
+        token_sweeper_task.cancel()
     if camera_manager:
-        camera_manager.stop_all()
+        await run_camera(camera_manager.stop_all)
     for pc in list(pcs):
         await pc.close()
     pcs.clear()
-    print("📷 Kamera gestoppt")
-    print("🛑 Server beendet.")
+    camera_log.info("📷 Kamera gestoppt")
+    server_log.info("🛑 Server beendet.")
+
+async def on_cleanup(app: web.Application):
+    # Erst nach on_shutdown: laufende Requests warten evtl. noch auf run_auth/run_camera
+    auth_executor.shutdown(wait=False)
+    camera_executor.shutdown(wait=False)
 
 def create_app() -> web.Application:
     global camera_manager
@@ -668,13 +969,15 @@ def create_app() -> web.Application:
     app.router.add_get("/admin/users", admin_users)
     app.router.add_post("/admin/delete", admin_delete)
     app.router.add_post("/admin/update", admin_update)
-    app.router.add_static("/static/", path="static", name="static")
+    app.router.add_static("/static/", path=STATIC_DIR, name="static")
+    app.on_startup.append(on_startup)
     app.on_shutdown.append(on_shutdown)
+    app.on_cleanup.append(on_cleanup)
     return app
 
 if __name__ == "__main__":
-    print("🚀 Starte VR-Racer ")
+    server_log.info("🚀 Starte VR-Racer ")
     configure_multicore()
     port = int(os.getenv("PORT", "8080"))
-    print(f"🌍 Lokaler Server für Cloudflare Tunnel: http://0.0.0.0:{port}")
+    server_log.info("🌍 Lokaler Server für Cloudflare Tunnel: http://0.0.0.0:%d", port)
     web.run_app(create_app(), host="0.0.0.0", port=port)
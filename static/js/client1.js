@@ -133,7 +133,8 @@ async function login() {
     if (res.status === 200 || res.status === 202) {
       const json = JSON.parse(data);
       token = json.token;                               // JWT speichern
-      tokenExpiry = Date.now() + json.expires_in * 1000; // Ablaufzeit berechnen
+      // Ablaufzeit berechnen (expires_in = null → Token läuft nie ab)
+      tokenExpiry = json.expires_in == null ? Infinity : Date.now() + json.expires_in * 1000;
       isAdmin = (res.status === 202);                    // Admin-Flag
 
       // Token lokal im Browser speichern
@@ -457,6 +458,7 @@ function escapeHtml(str) {
 // Logout planen, wenn Token abläuft
 function scheduleTokenExpiryLogout() {
   if (tokenTimer) clearTimeout(tokenTimer);
+  if (tokenExpiry === Infinity) return; // Kein Ablauf → kein Countdown
   const timeLeft = tokenExpiry - Date.now();
   if (timeLeft <= 0) {
     logoutDueToExpiry(); // Falls bereits abgelaufen
@@ -530,9 +532,10 @@ document.addEventListener("DOMContentLoaded", () => {
   const adminFlag = localStorage.getItem("is_admin");
 
   // Wenn gültiger Token existiert → Auto-Login
-  if (savedToken && savedExpiry && Date.now() < parseInt(savedExpiry)) {
+  // Number() statt parseInt(), damit "Infinity" (nie ablaufend) erhalten bleibt
+  if (savedToken && savedExpiry && Date.now() < Number(savedExpiry)) {
     token = savedToken;
-    tokenExpiry = parseInt(savedExpiry);
+    tokenExpiry = Number(savedExpiry);
     isAdmin = (adminFlag === "true");
     scheduleTokenExpiryLogout();
         // Video sicher entfernen, falls noch da